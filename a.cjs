@@ -1,4 +1,5 @@
 const fs = require('fs');
+const os = require('os');
 const path = require('path');
 const { createCanvas, loadImage } = require('canvas');
 const Display = require('./e.cjs');
@@ -17,34 +18,44 @@ const frames = fs
 
 const canvas = createCanvas(W, H);
 const ctx = canvas.getContext('2d');
+const LITTLE_ENDIAN = os.endianness() === 'LE';
+
+// Frames already decoded and scaled, kept as packed RGB so every loop after
+// the first skips loadImage + drawImage. Capped to bound memory on long clips.
+const CACHE_FRAMES = 1024;
+const cache = [];
 
 let i = 0;
 
 async function playFrame() {
   if (i >= frames.length) i = 0;
 
-  const img = await loadImage(path.join(framesDir, frames[i]));
-  ctx.drawImage(img, 0, 0, W, H);
-
-  const data = ctx.getImageData(0, 0, W, H).data;
-
-  for (let y = 0; y < H; y++) {
-    for (let x = 0; x < W; x++) {
-      const idx = (y * W + x) * 4;
-      d.setPixel(
-        x,
-        y,
-        data[idx],
-        data[idx + 1],
-        data[idx + 2]
-      );
-    }
+  if (cache[i]) {
+    d.loadFromRGB(cache[i]);
+  } else {
+    const img = await loadImage(path.join(framesDir, frames[i]));
+    // Bilinear is plenty for mild downscales; keep cairo's box-filtered
+    // 'good' only when shrinking more than 4x, where bilinear aliases badly
+    ctx.quality = Math.min(W / img.width, H / img.height) < 0.25 ? 'good' : 'bilinear';
+    ctx.drawImage(img, 0, 0, W, H);
+
+    // The raw buffer is cairo's own pixel memory order (BGRA on little-endian),
+    // so it skips getImageData's un-premultiply + RGBA conversion pass
+    if (LITTLE_ENDIAN) d.loadFromBGRA(canvas.toBuffer('raw'));
+    else d.loadFromImageData(ctx.getImageData(0, 0, W, H));
+    if (i < CACHE_FRAMES) cache[i] = d.rgb.slice();
   }
 
   d.draw();
   i++;
 }
 
+// A tick that fires while the previous frame is still loading is skipped
+// rather than stacking up overlapping loads
+let busy = false;
+
 setInterval(() => {
-  playFrame().catch(console.error);
+  if (busy) return;
+  busy = true;
+  playFrame().catch(console.error).finally(() => { busy = false; });
 }, 1000 / FPS);
@@ -1,5 +1,7 @@
 // term-display.js — OPTIMIZED BLOCK MODE RENDERER
 
+const fs = require('fs');
+
 const BLOCK_CHARS = [
   ' ','🬀','🬁','🬆','🬂','🬇','🬋','🬕','🬃','🬈','🬌','🬖','🬏','🬙','🬟','🬩',
   '🬄','🬉','🬍','🬗','🬐','🬚','🬠','🬪','🬒','🬜','🬢','🬬','🬥','🬯','🬲','🬸',
@@ -7,6 +9,102 @@ const BLOCK_CHARS = [
   '🬔','🬞','🬤','🬮','🬧','🬱','🬴','🬺','🬨','🬵','🬶','🬻','🬷','🬼','🬽','█'
 ];
 
+// UTF-8 bytes of each block character as [length, b0, b1, b2, b3]
+const BLOCK_UTF8 = new Uint8Array(64 * 5);
+BLOCK_CHARS.forEach((ch, mask) => {
+  const bytes = Buffer.from(ch);
+  BLOCK_UTF8[mask * 5] = bytes.length;
+  BLOCK_UTF8.set(bytes, mask * 5 + 1);
+});
+
+// Decimal digits of every channel value as [length, d0, d1, d2] bytes,
+// so escapes never format numbers
+const DEC = new Uint8Array(256 * 4);
+for (let v = 0; v < 256; v++) {
+  const s = String(v);
+  DEC[v * 4] = s.length;
+  for (let k = 0; k < s.length; k++) DEC[v * 4 + 1 + k] = s.charCodeAt(k);
+}
+
+// Most bytes one cell can emit: fg and bg ESC[38;2;255;255;255m, ESC[49m,
+// and a 4-byte block character
+const CELL_MAX = 19 + 19 + 5 + 4;
+
+// Writes a run of n empty cells (default colors) at pos and returns the new
+// end. Long runs become ESC[<n>X (erase, cursor stays) plus ESC[<n>C (skip
+// over them), or just the erase at the end of a row, whichever is shorter.
+function putBlank(buf, pos, n, eol) {
+  const count = String(n);
+  if (n <= (eol ? 3 + count.length : 6 + 2 * count.length)) {
+    buf.fill(0x20, pos, pos + n);
+    return pos + n;
+  }
+  buf[pos++] = 0x1b; buf[pos++] = 0x5b;
+  pos += buf.write(count, pos, 'latin1');
+  buf[pos++] = 0x58;
+  if (!eol) {
+    buf[pos++] = 0x1b; buf[pos++] = 0x5b;
+    pos += buf.write(count, pos, 'latin1');
+    buf[pos++] = 0x43;
+  }
+  return pos;
+}
+
+// Writes ESC[<row + 1>;1H at pos and returns the new end
+function putCursor(buf, pos, row) {
+  buf[pos++] = 0x1b; buf[pos++] = 0x5b;
+  pos += buf.write(String(row + 1), pos, 'latin1');
+  buf[pos++] = 0x3b; buf[pos++] = 0x31; buf[pos++] = 0x48;
+  return pos;
+}
+
+// Writes ESC[<lead>8;2;<r>;<g>;<b>m at pos (lead '3' = fg, '4' = bg) and
+// returns the new end
+function putColor(buf, pos, lead, r, g, b) {
+  buf[pos++] = 0x1b; buf[pos++] = 0x5b; buf[pos++] = lead; buf[pos++] = 0x38;
+  buf[pos++] = 0x3b; buf[pos++] = 0x32;
+  pos = putDec(buf, pos, r);
+  pos = putDec(buf, pos, g);
+  pos = putDec(buf, pos, b);
+  buf[pos++] = 0x6d;
+  return pos;
+}
+
+// Writes ;<v> at pos from the digit table and returns the new end
+function putDec(buf, pos, v) {
+  const d = v * 4, n = DEC[d];
+  buf[pos++] = 0x3b;
+  buf[pos++] = DEC[d + 1];
+  if (n > 1) buf[pos++] = DEC[d + 2];
+  if (n > 2) buf[pos++] = DEC[d + 3];
+  return pos;
+}
+
+// 16.16 reciprocals of the 1-6 subpixels a cell can average over;
+// (sum * RECIP[n]) >>> 16 equals sum / n | 0 for every sum up to 6 * 255
+const RECIP = Array.from({ length: 7 }, (_, n) => n && Math.ceil(65536 / n));
+
+// Frames go straight to fd 1 rather than through the stdout stream. If the
+// stream still has queued output, or fd 1 is non-blocking and full, the
+// remainder is queued on the stream instead so ordering is kept. Windows
+// always uses the stream: its console needs libuv's UTF-16 conversion and
+// escape handling, which a raw write to fd 1 would skip.
+const DIRECT_WRITE = process.platform !== 'win32';
+
+function writeOut(buf) {
+  if (!DIRECT_WRITE || process.stdout.writableLength > 0) {
+    process.stdout.write(buf);
+    return;
+  }
+  let off = 0;
+  try {
+    while (off < buf.length) off += fs.writeSync(1, buf, off, buf.length - off);
+  } catch (err) {
+    if (err.code !== 'EAGAIN') throw err;
+    process.stdout.write(buf.subarray(off));
+  }
+}
+
 class TermDisplay {
   constructor(width, height) {
     this.width = width;
@@ -16,11 +114,19 @@ class TermDisplay {
     this.cellW = Math.ceil(width / 2);
     this.cellH = Math.ceil(height / 3);
 
-    // Flat arrays for speed
-    const size = width * height;
-    this.r = new Uint8Array(size);
-    this.g = new Uint8Array(size);
-    this.b = new Uint8Array(size);
+    // One flat interleaved RGB array for speed
+    this.rgb = new Uint8Array(width * height * 3);
+    // Set by every pixel write; draw() skips frames where nothing changed
+    this.dirty = true;
+    // Reused byte buffers: this frame, the last one (to skip unchanged rows),
+    // and the output, each big enough for the largest possible frame
+    const frameBytes = this.cellH * (this.cellW * CELL_MAX + 5);
+    this.frame = Buffer.allocUnsafe(frameBytes);
+    this.prevFrame = Buffer.allocUnsafe(frameBytes);
+    this.rowStarts = new Int32Array(this.cellH + 1);
+    this.prevRowStarts = new Int32Array(this.cellH + 1);
+    this.hasPrev = false;
+    this.out = Buffer.allocUnsafe(frameBytes + this.cellH * 16);
 
     process.stdout.write('\x1b[2J\x1b[H\x1b[?25l');
     process.on('exit', () => {
@@ -29,9 +135,15 @@ class TermDisplay {
   }
 
   clear(r = 0, g = 0, b = 0) {
-    this.r.fill(r);
-    this.g.fill(g);
-    this.b.fill(b);
+    const rgb = this.rgb;
+    this.dirty = true;
+    if (r === g && g === b) {
+      rgb.fill(r);
+      return;
+    }
+    // Seed the first pixel, then keep doubling the filled prefix
+    rgb[0] = r; rgb[1] = g; rgb[2] = b;
+    for (let n = 3; n < rgb.length; n *= 2) rgb.copyWithin(n, 0, n);
   }
 
   setPixel(x, y, r, g, b) {
@@ -39,33 +151,74 @@ class TermDisplay {
     y = y | 0;
     if (x < 0 || y < 0 || x >= this.width || y >= this.height) return;
     
-    const i = y * this.width + x;
-    this.r[i] = r;
-    this.g[i] = g;
-    this.b[i] = b;
+    const i = (y * this.width + x) * 3;
+    this.dirty = true;
+    this.rgb[i] = r;
+    this.rgb[i + 1] = g;
+    this.rgb[i + 2] = b;
+  }
+
+  loadFromImageData(imageData) {
+    const data = imageData.data;
+    const rgb = this.rgb;
+    this.dirty = true;
+    for (let i = 0, src = 0; i < rgb.length; i += 3, src += 4) {
+      rgb[i] = data[src];
+      rgb[i + 1] = data[src + 1];
+      rgb[i + 2] = data[src + 2];
+    }
+  }
+
+  // BGRA/BGRX bytes, e.g. node-canvas's raw buffer on little-endian hosts
+  loadFromBGRA(data) {
+    const rgb = this.rgb;
+    this.dirty = true;
+    for (let i = 0, src = 0; i < rgb.length; i += 3, src += 4) {
+      rgb[i] = data[src + 2];
+      rgb[i + 1] = data[src + 1];
+      rgb[i + 2] = data[src];
+    }
+  }
+
+  // Packed RGB bytes (e.g. an rgb24 frame from ffmpeg), copied in one go
+  loadFromRGB(data) {
+    this.rgb.set(data.subarray(0, this.rgb.length));
+    this.dirty = true;
   }
 
   draw() {
-    let out = '\x1b[H';
-    let lastFg = '', lastBg = '';
+    if (!this.dirty) return;
+    this.dirty = false;
+
+    // Render every row into the frame buffer; only rows that differ from the
+    // previous frame are copied to the terminal below
+    const out = this.frame;
+    const starts = this.rowStarts;
+    let pos = 0;
+
+    let lastFg = -1, lastBg = -1;
+    let blank = 0; // pending run of empty default-colored cells
+    const w = this.width;
+    const stride = w * 3;
+    const rgb = this.rgb;
 
     for (let cy = 0; cy < this.cellH; cy++) {
+      starts[cy] = pos;
+      const rows = Math.min(3, this.height - cy * 3);
       for (let cx = 0; cx < this.cellW; cx++) {
+        const cols = Math.min(2, w - cx * 2);
         let mask = 0;
         let fgR = 0, fgG = 0, fgB = 0, fgN = 0;
         let bgR = 0, bgG = 0, bgB = 0, bgN = 0;
 
-        // Check 6 pixels in 2x3 grid
-        for (let py = 0; py < 3; py++) {
-          for (let px = 0; px < 2; px++) {
-            const x = cx * 2 + px;
-            const y = cy * 3 + py;
-            if (x >= this.width || y >= this.height) continue;
-
-            const i = y * this.width + x;
-            const pr = this.r[i];
-            const pg = this.g[i];
-            const pb = this.b[i];
+        // Check 6 pixels in 2x3 grid (clipped at the right/bottom edge)
+        let row = (cy * 3 * w + cx * 2) * 3;
+        for (let py = 0; py < rows; py++, row += stride) {
+          for (let px = 0; px < cols; px++) {
+            const i = row + px * 3;
+            const pr = rgb[i];
+            const pg = rgb[i + 1];
+            const pb = rgb[i + 2];
             const brightness = pr + pg + pb;
 
             const bit = py * 2 + px;
@@ -79,41 +232,80 @@ class TermDisplay {
           }
         }
 
-        // Render cell
-        if (mask === 0) {
-          // No foreground pixels
-          if (bgN > 0) {
-            const bg = `\x1b[48;2;${bgR/bgN|0};${bgG/bgN|0};${bgB/bgN|0}m`;
-            if (bg !== lastBg) { out += bg; lastBg = bg; }
-            out += ' ';
-          } else {
-            if (lastBg || lastFg) {
-              out += '\x1b[0m';
-              lastBg = lastFg = '';
-            }
-            out += ' ';
+        // Render cell. Colors are compared packed as 0xRRGGBB (-1 = terminal
+        // default) so an escape is only written when the color changes.
+        if (mask === 0 && bgN === 0) {
+          // Empty cell: reset colors if needed, then only count it; the run
+          // is written once it ends
+          if (lastBg !== -1 || lastFg !== -1) {
+            out[pos++] = 0x1b; out[pos++] = 0x5b; out[pos++] = 0x30; out[pos++] = 0x6d; // ESC[0m
+            lastBg = lastFg = -1;
           }
+          blank++;
+          continue;
+        }
+        if (blank > 0) {
+          pos = putBlank(out, pos, blank, false);
+          blank = 0;
+        }
+
+        if (mask === 0) {
+          // Background only
+          const bInv = RECIP[bgN];
+          const bR = bgR * bInv >>> 16, bG = bgG * bInv >>> 16, bB = bgB * bInv >>> 16;
+          const bg = bR << 16 | bG << 8 | bB;
+          if (bg !== lastBg) { pos = putColor(out, pos, 0x34, bR, bG, bB); lastBg = bg; }
+          out[pos++] = 0x20;
         } else {
           // Has foreground pixels
-          const fg = `\x1b[38;2;${fgR/fgN|0};${fgG/fgN|0};${fgB/fgN|0}m`;
-          if (fg !== lastFg) { out += fg; lastFg = fg; }
+          const fInv = RECIP[fgN];
+          const fR = fgR * fInv >>> 16, fG = fgG * fInv >>> 16, fB = fgB * fInv >>> 16;
+          const fg = fR << 16 | fG << 8 | fB;
+          if (fg !== lastFg) { pos = putColor(out, pos, 0x33, fR, fG, fB); lastFg = fg; }
 
           if (bgN > 0 && mask !== 63) {
-            const bg = `\x1b[48;2;${bgR/bgN|0};${bgG/bgN|0};${bgB/bgN|0}m`;
-            if (bg !== lastBg) { out += bg; lastBg = bg; }
-          } else if (lastBg) {
-            out += '\x1b[49m';
-            lastBg = '';
+            const bInv = RECIP[bgN];
+            const bR = bgR * bInv >>> 16, bG = bgG * bInv >>> 16, bB = bgB * bInv >>> 16;
+            const bg = bR << 16 | bG << 8 | bB;
+            if (bg !== lastBg) { pos = putColor(out, pos, 0x34, bR, bG, bB); lastBg = bg; }
+          } else if (lastBg !== -1) {
+            out[pos++] = 0x1b; out[pos++] = 0x5b; out[pos++] = 0x34; out[pos++] = 0x39; out[pos++] = 0x6d; // ESC[49m
+            lastBg = -1;
           }
 
-          out += BLOCK_CHARS[mask];
+          const c = mask * 5;
+          for (let k = 1; k <= BLOCK_UTF8[c]; k++) out[pos++] = BLOCK_UTF8[c + k];
         }
       }
-      out += '\x1b[0m\n';
-      lastFg = lastBg = '';
+      if (blank > 0) {
+        pos = putBlank(out, pos, blank, true);
+        blank = 0;
+      }
+      out[pos++] = 0x1b; out[pos++] = 0x5b; out[pos++] = 0x30; out[pos++] = 0x6d; // ESC[0m
+      out[pos++] = 0x0a;
+      lastFg = lastBg = -1;
     }
+    starts[this.cellH] = pos;
 
-    process.stdout.write(out);
+    // A previous frame still queued on an async stdout keeps its buffer
+    if (process.stdout.writableLength > 0) this.out = Buffer.allocUnsafe(this.out.length);
+    const prev = this.prevFrame, prevStarts = this.prevRowStarts;
+    let len = 0, cursor = -1;
+    for (let cy = 0; cy < this.cellH; cy++) {
+      const s = starts[cy], e = starts[cy + 1];
+      if (this.hasPrev && out.compare(prev, prevStarts[cy], prevStarts[cy + 1], s, e) === 0) continue;
+      if (cursor !== cy) len = putCursor(this.out, len, cy);
+      len += out.copy(this.out, len, s, e);
+      cursor = cy + 1;
+    }
+    // Park the cursor below the picture, where later output belongs
+    if (len > 0 && cursor !== this.cellH) len = putCursor(this.out, len, this.cellH);
+
+    this.frame = prev; this.prevFrame = out;
+    this.rowStarts = prevStarts; this.prevRowStarts = starts;
+    this.hasPrev = true;
+
+    if (len > 0) writeOut(this.out.subarray(0, len));
   }
 
   drawLine(x0, y0, x1, y1, r, g, b) {
@@ -139,13 +331,14 @@ class TermDisplay {
     const x1 = Math.min(this.width, x + w | 0);
     const y1 = Math.min(this.height, y + h | 0);
 
+    const rgb = this.rgb;
+    this.dirty = true;
     for (let py = y0; py < y1; py++) {
-      const row = py * this.width;
-      for (let px = x0; px < x1; px++) {
-        const i = row + px;
-        this.r[i] = r;
-        this.g[i] = g;
-        this.b[i] = b;
+      let i = (py * this.width + x0) * 3;
+      for (let px = x0; px < x1; px++, i += 3) {
+        rgb[i] = r;
+        rgb[i + 1] = g;
+        rgb[i + 2] = b;
       }
     }
   }
@@ -156,17 +349,46 @@ class TermDisplay {
     const minY = Math.max(0, cy - radius - 1 | 0);
     const maxY = Math.min(this.height, cy + radius + 2 | 0);
 
+    // Compare squared distances instead of taking a sqrt per pixel:
+    // filled is d <= radius, outline is radius - 1 < d < radius + 1
+    const inner = radius - 1, outer = radius + 1;
+    const fill2 = radius >= 0 ? radius * radius : -1;
+    const inner2 = inner >= 0 ? inner * inner : -1;
+    const outer2 = outer > 0 ? outer * outer : -1;
+
     for (let y = minY; y < maxY; y++) {
       const dy = y - cy;
+      const dy2 = dy * dy;
+
+      if (filled) {
+        // Solve dx^2 <= fill2 - dy^2 for this row's span, then nudge the
+        // ends so rounding in sqrt can't disagree with the exact test
+        const rem = fill2 - dy2;
+        if (rem < 0) continue;
+        const half = Math.sqrt(rem);
+        let x0 = Math.max(minX, Math.ceil(cx - half));
+        let x1 = Math.min(maxX - 1, Math.floor(cx + half));
+        while (x0 > minX && (x0 - 1 - cx) ** 2 <= rem) x0--;
+        while (x0 <= x1 && (x0 - cx) ** 2 > rem) x0++;
+        while (x1 < maxX - 1 && (x1 + 1 - cx) ** 2 <= rem) x1++;
+        while (x1 >= x0 && (x1 - cx) ** 2 > rem) x1--;
+        if (x0 > x1) continue;
+
+        const rgb = this.rgb;
+        this.dirty = true;
+        const end = (y * this.width + x1 + 1) * 3;
+        for (let i = (y * this.width + x0) * 3; i < end; i += 3) {
+          rgb[i] = r;
+          rgb[i + 1] = g;
+          rgb[i + 2] = b;
+        }
+        continue;
+      }
+
       for (let x = minX; x < maxX; x++) {
         const dx = x - cx;
-        const d = Math.sqrt(dx * dx + dy * dy);
-        
-        if (filled) {
-          if (d <= radius) this.setPixel(x, y, r, g, b);
-        } else {
-          if (Math.abs(d - radius) < 1) this.setPixel(x, y, r, g, b);
-        }
+        const d2 = dx * dx + dy2;
+        if (d2 > inner2 && d2 < outer2) this.setPixel(x, y, r, g, b);
       }
     }
   }
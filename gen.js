@@ -2,138 +2,16 @@
 
 const fs = require('fs');
 const { spawn } = require('child_process');
-const { createCanvas, loadImage } = require('canvas');
+const TermDisplay = require('./e.cjs');
 
-const BLOCK_CHARS = [
-  ' ','🬀','🬁','🬆','🬂','🬇','🬋','🬕','🬃','🬈','🬌','🬖','🬏','🬙','🬟','🬩',
-  '🬄','🬉','🬍','🬗','🬐','🬚','🬠','🬪','🬒','🬜','🬢','🬬','🬥','🬯','🬲','🬸',
-  '🬅','🬊','🬎','🬘','🬑','🬛','🬡','🬫','🬓','🬝','🬣','🬭','🬦','🬰','🬳','🬹',
-  '🬔','🬞','🬤','🬮','🬧','🬱','🬴','🬺','🬨','🬵','🬶','🬻','🬷','🬼','🬽','█'
-];
-
-class TermDisplay {
-  constructor(width, height) {
-    this.width = width;
-    this.height = height;
-    this.cellW = Math.ceil(width / 2);
-    this.cellH = Math.ceil(height / 3);
-
-    const size = width * height;
-    this.r = new Uint8Array(size);
-    this.g = new Uint8Array(size);
-    this.b = new Uint8Array(size);
-
-    process.stdout.write('\x1b[2J\x1b[H\x1b[?25l');
-    process.on('exit', () => {
-      process.stdout.write('\x1b[?25h\x1b[0m\n');
-    });
-  }
-
-  clear(r = 0, g = 0, b = 0) {
-    this.r.fill(r);
-    this.g.fill(g);
-    this.b.fill(b);
-  }
-
-  setPixel(x, y, r, g, b) {
-    x = x | 0;
-    y = y | 0;
-    if (x < 0 || y < 0 || x >= this.width || y >= this.height) return;
-    const i = y * this.width + x;
-    this.r[i] = r;
-    this.g[i] = g;
-    this.b[i] = b;
-  }
-
-  loadFromImageData(imageData) {
-    const data = imageData.data;
-    for (let y = 0; y < this.height; y++) {
-      for (let x = 0; x < this.width; x++) {
-        const i = y * this.width + x;
-        const srcIdx = (y * this.width + x) * 4;
-        this.r[i] = data[srcIdx];
-        this.g[i] = data[srcIdx + 1];
-        this.b[i] = data[srcIdx + 2];
-      }
-    }
-  }
-
-  draw() {
-    let out = '\x1b[H';
-    let lastFg = '', lastBg = '';
-
-    for (let cy = 0; cy < this.cellH; cy++) {
-      for (let cx = 0; cx < this.cellW; cx++) {
-        let mask = 0;
-        let fgR = 0, fgG = 0, fgB = 0, fgN = 0;
-        let bgR = 0, bgG = 0, bgB = 0, bgN = 0;
-
-        for (let py = 0; py < 3; py++) {
-          for (let px = 0; px < 2; px++) {
-            const x = cx * 2 + px;
-            const y = cy * 3 + py;
-            if (x >= this.width || y >= this.height) continue;
-
-            const i = y * this.width + x;
-            const pr = this.r[i];
-            const pg = this.g[i];
-            const pb = this.b[i];
-            const brightness = pr + pg + pb;
-
-            const bit = py * 2 + px;
-            
-            if (brightness > 30) {
-              mask |= (1 << bit);
-              fgR += pr; fgG += pg; fgB += pb; fgN++;
-            } else if (brightness > 0) {
-              bgR += pr; bgG += pg; bgB += pb; bgN++;
-            }
-          }
-        }
-
-        if (mask === 0) {
-          if (bgN > 0) {
-            const bg = `\x1b[48;2;${bgR/bgN|0};${bgG/bgN|0};${bgB/bgN|0}m`;
-            if (bg !== lastBg) { out += bg; lastBg = bg; }
-            out += ' ';
-          } else {
-            if (lastBg || lastFg) {
-              out += '\x1b[0m';
-              lastBg = lastFg = '';
-            }
-            out += ' ';
-          }
-        } else {
-          const fg = `\x1b[38;2;${fgR/fgN|0};${fgG/fgN|0};${fgB/fgN|0}m`;
-          if (fg !== lastFg) { out += fg; lastFg = fg; }
-
-          if (bgN > 0 && mask !== 63) {
-            const bg = `\x1b[48;2;${bgR/bgN|0};${bgG/bgN|0};${bgB/bgN|0}m`;
-            if (bg !== lastBg) { out += bg; lastBg = bg; }
-          } else if (lastBg) {
-            out += '\x1b[49m';
-            lastBg = '';
-          }
-
-          out += BLOCK_CHARS[mask];
-        }
-      }
-      out += '\x1b[0m\n';
-      lastFg = lastBg = '';
-    }
-
-    process.stdout.write(out);
-  }
-}
-
-// Get video FPS using ffprobe
-function getVideoFPS(videoPath) {
+// Get video frame size and FPS using ffprobe
+function getVideoInfo(videoPath) {
   return new Promise((resolve, reject) => {
     const ffprobe = spawn('ffprobe', [
       '-v', 'error',
       '-select_streams', 'v:0',
-      '-show_entries', 'stream=r_frame_rate',
-      '-of', 'default=noprint_wrappers=1:nokey=1',
+      '-show_entries', 'stream=width,height,r_frame_rate',
+      '-of', 'default=noprint_wrappers=1',
       videoPath
     ]);
 
@@ -142,16 +20,25 @@ function getVideoFPS(videoPath) {
       output += data.toString();
     });
 
+    ffprobe.on('error', () => reject(new Error('Failed to get video info')));
     ffprobe.on('close', (code) => {
       if (code !== 0) {
-        reject(new Error('Failed to get video FPS'));
+        reject(new Error('Failed to get video info'));
         return;
       }
-      
-      // Parse fraction like "30000/1001" or "30/1"
-      const parts = output.trim().split('/');
-      const fps = parseInt(parts[0]) / parseInt(parts[1]);
-      resolve(fps);
+
+      // Parse lines like "width=1920", "height=1080" and "r_frame_rate=30000/1001"
+      const info = {};
+      for (const line of output.trim().split('\n')) {
+        const [key, value] = line.trim().split('=');
+        info[key] = value;
+      }
+      const parts = (info.r_frame_rate || '').split('/');
+      resolve({
+        width: parseInt(info.width),
+        height: parseInt(info.height),
+        fps: parseInt(parts[0]) / parseInt(parts[1])
+      });
     });
   });
 }
@@ -163,15 +50,23 @@ async function playVideo(videoPath, targetWidth = 200, targetFPS = null) {
     process.exit(1);
   }
 
-  // Get actual video FPS if not specified
+  // Probe the source once for its frame size and FPS
+  console.log('[INFO] Probing video...');
+  const source = await getVideoInfo(videoPath);
+
+  // Use the actual video FPS if not specified
   if (!targetFPS) {
-    console.log('[INFO] Detecting video FPS...');
-    targetFPS = await getVideoFPS(videoPath);
+    targetFPS = source.fps;
     console.log(`[INFO] Detected FPS: ${targetFPS.toFixed(2)}`);
   }
 
   // Calculate height maintaining aspect ratio (assume 16:9)
   const targetHeight = Math.floor(targetWidth * 9 / 16);
+
+  // Area averaging only helps when shrinking; otherwise keep ffmpeg's default
+  // scaler
+  const shrinking = targetWidth < source.width && targetHeight < source.height;
+  const scaleFlags = shrinking ? ':flags=area' : '';
   
   console.log(`[INFO] Playing: ${videoPath}`);
   console.log(`[INFO] Resolution: ${targetWidth}x${targetHeight} pixels`);
@@ -179,8 +74,6 @@ async function playVideo(videoPath, targetWidth = 200, targetFPS = null) {
   console.log('[INFO] Press Ctrl+C to stop\n');
 
   const display = new TermDisplay(targetWidth, targetHeight);
-  const canvas = createCanvas(targetWidth, targetHeight);
-  const ctx = canvas.getContext('2d');
 
   // Start audio playback with ffplay (separate process)
   const audio = spawn('ffplay', [
@@ -192,10 +85,11 @@ async function playVideo(videoPath, targetWidth = 200, targetFPS = null) {
     stdio: 'ignore'
   });
 
-  // Extract frames using ffmpeg
+  // Extract frames using ffmpeg (hardware decoding when available)
   const ffmpeg = spawn('ffmpeg', [
+    '-hwaccel', 'auto',
     '-i', videoPath,
-    '-vf', `fps=${targetFPS},scale=${targetWidth}:${targetHeight}`,
+    '-vf', `fps=${targetFPS},scale=${targetWidth}:${targetHeight}${scaleFlags}`,
     '-f', 'image2pipe',
     '-pix_fmt', 'rgb24',
     '-vcodec', 'rawvideo',
@@ -205,53 +99,92 @@ async function playVideo(videoPath, targetWidth = 200, targetFPS = null) {
   });
 
   const frameSize = targetWidth * targetHeight * 3;
-  let buffer = Buffer.alloc(0);
   let frameCount = 0;
+  let dropped = 0;
   const frameDuration = 1000 / targetFPS; // milliseconds per frame
   const startTime = Date.now();
 
-  ffmpeg.stdout.on('data', (chunk) => {
-    buffer = Buffer.concat([buffer, chunk]);
+  // Decoded frames wait here until their presentation time. When the queue
+  // is full ffmpeg's stdout is paused, so decoding never runs far ahead and
+  // the event loop is never blocked waiting for the next frame.
+  const MAX_QUEUED = 4;
+  const queue = [];
+  let timer = null;
+  let ended = false;
+
+  // Frame-sized buffers are filled straight from ffmpeg's chunks and go back
+  // to the pool once shown, so steady-state playback allocates nothing
+  const pool = [];
+  let filling = null;
+  let filled = 0;
+
+  function showNext() {
+    timer = null;
+    const frameData = queue.shift();
+
+    // More than a frame behind schedule (slow terminal): drop this one while
+    // newer frames are waiting, so the picture keeps pace with the audio
+    const late = Date.now() - (startTime + frameCount * frameDuration);
+    if (late > frameDuration && queue.length > 0) {
+      dropped++;
+    } else {
+      // ffmpeg already emits rgb24, the display's own layout
+      display.loadFromRGB(frameData);
+      display.draw();
+    }
+    pool.push(frameData);
+    
+    frameCount++;
 
-    while (buffer.length >= frameSize) {
-      const frameData = buffer.slice(0, frameSize);
-      buffer = buffer.slice(frameSize);
+    if (queue.length < MAX_QUEUED && ffmpeg.stdout.isPaused()) {
+      ffmpeg.stdout.resume();
+    }
+    schedule();
+  }
 
-      // Convert raw RGB to ImageData
-      const imageData = ctx.createImageData(targetWidth, targetHeight);
-      for (let i = 0; i < targetWidth * targetHeight; i++) {
-        imageData.data[i * 4] = frameData[i * 3];     // R
-        imageData.data[i * 4 + 1] = frameData[i * 3 + 1]; // G
-        imageData.data[i * 4 + 2] = frameData[i * 3 + 2]; // B
-        imageData.data[i * 4 + 3] = 255;                   // A
-      }
+  function schedule() {
+    if (timer) return;
+    if (queue.length === 0) {
+      if (ended) finish();
+      return;
+    }
 
-      // Load into display and render
-      display.loadFromImageData(imageData);
-      display.draw();
-      
-      frameCount++;
-      
-      // Calculate when next frame should be displayed
-      const expectedTime = startTime + (frameCount * frameDuration);
-      const currentTime = Date.now();
-      const delay = expectedTime - currentTime;
-      
-      // Sleep to maintain correct framerate
-      if (delay > 0) {
-        const sleepUntil = Date.now() + delay;
-        while (Date.now() < sleepUntil) {
-          // Busy wait for precise timing
-        }
+    // Calculate when next frame should be displayed
+    const expectedTime = startTime + (frameCount * frameDuration);
+    timer = setTimeout(showNext, Math.max(0, expectedTime - Date.now()));
+  }
+
+  function finish() {
+    audio.kill(); // Stop audio when video ends
+    process.stdout.write('\x1b[?25h\x1b[0m\n');
+    console.log(`\n[DONE] Played ${frameCount} frames (${dropped} dropped)`);
+    process.exit(0);
+  }
+
+  ffmpeg.stdout.on('data', (chunk) => {
+    let off = 0;
+    while (off < chunk.length) {
+      if (!filling) {
+        filling = pool.pop() || Buffer.allocUnsafe(frameSize);
+        filled = 0;
+      }
+      const n = chunk.copy(filling, filled, off, Math.min(chunk.length, off + frameSize - filled));
+      filled += n;
+      off += n;
+      if (filled === frameSize) {
+        queue.push(filling);
+        filling = null;
       }
     }
+
+    if (queue.length >= MAX_QUEUED) ffmpeg.stdout.pause();
+    schedule();
   });
 
   ffmpeg.on('close', (code) => {
-    audio.kill(); // Stop audio when video ends
-    process.stdout.write('\x1b[?25h\x1b[0m\n');
-    console.log(`\n[DONE] Played ${frameCount} frames`);
-    process.exit(0);
+    // Let the queued frames play out before exiting
+    ended = true;
+    schedule();
   });
 
   ffmpeg.on('error', (err) => {